@@ -32,6 +32,23 @@ import sys
 import ramsey_class
 from search_funcs import parallel_search, search_until_success, tabu_nolimit
 
+
+def positive_int(value: str) -> int:
+    """
+    Parses a command line argument that must be a positive integer.
+
+    Args:
+        value: The argument, as entered on the command line.
+
+    Returns:
+        The argument, as an integer.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
 # Get problem parameters and optional arguments from command line.
 parser = argparse.ArgumentParser(
     description="Use tabu search to find an edge-colored graph avoiding "
@@ -84,6 +101,13 @@ parser.add_argument(
     help="Print only the final construction of the search, and not the "
     'intermediate "record values."',
 )
+parser.add_argument(
+    "-e",
+    "--print_every",
+    type=positive_int,
+    default=1,
+    help='Print only every k-th intermediate "record value" (default = 1).',
+)
 parser.add_argument(
     "-s",
     "--save",
@@ -112,6 +136,7 @@ build_graph_params = {
 }
 tabu_params = {
     "print_bests": not args.quiet,
+    "print_every": args.print_every,
 }
 
 # Run tabu search.
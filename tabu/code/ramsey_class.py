@@ -1,5 +1,6 @@
 """
-Contains the RamseyGraph class.
+Contains the RamseyGraph class, and the HashSet class used to store the
+hashes of graphs visited during a search.
 
 Authorship:
     This code was written by Gwen McKinley, in support of the paper
@@ -9,25 +10,29 @@ Authorship:
 """
 
 import sys
-from typing import Any
+from typing import Any, Sequence
 
 import numpy as np
 
 from ramsey_funcs import (
+    binomial_table,
     common_neighbors,
     count_books,
     count_books_change,
     count_wheels,
     count_wheels_change,
+    edge_index,
     hash_adj_matrix,
+    hash_table_grow,
+    hash_table_insert,
     neighbors,
+    tabu_steps,
+    update_hash,
+    update_neighbors_on_edge,
     valid_moves,
+    zobrist_table,
 )
 
-# Do not truncate large matrices when printing.
-np.set_printoptions(threshold=sys.maxsize)
-np.set_printoptions(linewidth=sys.maxsize)
-
 
 class RamseyGraph:
     """
@@ -49,27 +54,42 @@ class RamseyGraph:
 
         bad_subgraph (str):Either 'books' or 'wheels.'
 
-        common_neighbors (array of sets): An array storing the set of
-            common neighbors of each pair of vertices of the graph, in
-            each color. Indexed by colors and vertices:
-            common_neighbors[c, i, j] is the set of common neighbors of
-            vertex i and vertex j in color c.
+        binomials (array of ints): A table of binomial coefficients,
+            used for counting books: binomials[k, n] is "n choose k."
+
+        common_neighbors (array of uint64): An array storing the set
+            of common neighbors of each pair of vertices of the graph,
+            in each color, as bitmasks. Indexed by colors and pairs of
+            vertices: bit w of common_neighbors[c, edge_index(i, j, n)]
+            is set iff w is a common neighbor of vertex i and vertex j
+            in color c.
 
         hash (int): A hash of the graph. Computed in such a way that it
             can be quickly updated when an edge of the graph is edited.
 
-        neighbors (array of sets): An array storing the set of neighbors
-            of each vertex of the graph in each color. Indexed by colors
-            and vertices: neighbors[c, v] is the set of neighbors of
-            vertex v in color c.
+        move_score_func (function): The function used to compute score
+            changes: "count_books_change" or "count_wheels_change".
+
+        neighbors (array of uint64): An array storing the set of
+            neighbors of each vertex of the graph in each color, as
+            bitmasks. Indexed by colors and vertices: bit w of
+            neighbors[c, v] is set iff w is a neighbor of vertex v in
+            color c.
 
         num_verts (int): The number of vertices in the graph.
 
         num_colors (int): The number of possible edge-colors.
 
-        valid_moves (list): A list of all possible edits to the edge
-            coloring, each stored as a tuple of the form
-            "(edge, new_color, current_color)."
+        other_colors (array of ints): Row c lists every color other
+            than c, in increasing order.
+
+        score_func (function): The function used to compute scores:
+            "count_books" or "count_wheels".
+
+        valid_moves (array of ints): An array of all possible edits
+            to the edge coloring, one per row, each of the form
+            "(u, v, new_color, current_color)." The num_colors - 1 moves
+            for each edge occupy a fixed block of rows.
     """
 
     def __init__(
@@ -93,6 +113,12 @@ class RamseyGraph:
                 ' clique). Scoring functions assume "true wheels" and will'
                 " overcount wheels of order less than 5 due to symmetry."
             )
+        elif adj_matrix.shape[0] > 64:  # noqa: PLR2004
+            raise ValueError(
+                "Graph with more than 64 vertices specified. Neighborhoods"
+                " are stored as 64-bit bitmasks, so at most 64 vertices are"
+                " supported."
+            )
 
         self.adj_matrix = adj_matrix
         self.bad_sizes = bad_sizes
@@ -101,8 +127,27 @@ class RamseyGraph:
         self.num_verts = adj_matrix.shape[0]
         self.num_colors = len(bad_sizes)
 
+        # Pick the scoring functions once, rather than on every call.
+        if bad_subgraph == "books":
+            self.score_func = count_books
+            self.move_score_func = count_books_change
+        else:
+            self.score_func = count_wheels
+            self.move_score_func = count_wheels_change
+
         self.valid_moves = valid_moves(self.adj_matrix, self.num_colors)
 
+        self.other_colors = np.array(
+            [
+                [c for c in range(self.num_colors) if c != color]
+                for color in range(self.num_colors)
+            ]
+        )
+
+        self.binomials = binomial_table(
+            max_n=self.num_verts, max_k=max(self.bad_sizes)
+        )
+
         self.neighbors = neighbors(
             adj_matrix=self.adj_matrix,
             num_verts=self.num_verts,
@@ -116,9 +161,15 @@ class RamseyGraph:
         )
 
         self.hash = hash_adj_matrix(
-            adj_matrix=self.adj_matrix, num_verts=self.num_verts
+            adj_matrix=self.adj_matrix,
+            num_verts=self.num_verts,
+            num_colors=self.num_colors,
         )
 
+        # The hash of the graph when it was last formatted as a string,
+        # along with that string (see "__str__").
+        self._str_cache = None
+
     def __str__(self):
         """Pretty formatting for adjacency matrix.
 
@@ -127,7 +178,16 @@ class RamseyGraph:
         2-edge-coloring, can be copy-pasted as a graph adjacency matrix
         directly into Sage.
         """
-        return str(np.array2string(self.adj_matrix, separator=","))
+        # Formatting large matrices is slow, so reuse the last string
+        # unless the graph has changed since.
+        if self._str_cache is None or self._str_cache[0] != self.hash:
+            # Do not truncate or wrap large matrices.
+            with np.printoptions(threshold=sys.maxsize, linewidth=sys.maxsize):
+                self._str_cache = (
+                    self.hash,
+                    str(np.array2string(self.adj_matrix, separator=",")),
+                )
+        return self._str_cache[1]
 
     # Represent the graph by its adjacency matrix for debugging, etc.
     __repr__ = __str__
@@ -147,24 +207,18 @@ class RamseyGraph:
             'books', it will return the number of 4-vertex books in
             color 0, plus the number of 5-vertex books in color 1.
         """
-        if self.bad_subgraph == "books":
-            score_func = count_books
-        elif self.bad_subgraph == "wheels":
-            score_func = count_wheels
-        else:
-            pass
-
-        score = score_func(
+        score = self.score_func(
             adj_matrix=self.adj_matrix,
             neighbors=self.neighbors,
             common_neighbors=self.common_neighbors,
             num_colors=self.num_colors,
             num_verts=self.num_verts,
             bad_sizes=self.bad_sizes,
+            binomials=self.binomials,
         )
         return score
 
-    def move_score(self, edge_change: tuple[tuple, int, int]) -> int:
+    def move_score(self, edge_change: Sequence[int]) -> int:
         """
         Score change function.
 
@@ -174,46 +228,47 @@ class RamseyGraph:
             our edge-colored graph. Does *not* actually perform this
             change (i.e., the original graph is untouched).
         """
-        if self.bad_subgraph == "books":
-            move_score_func = count_books_change
-        elif self.bad_subgraph == "wheels":
-            move_score_func = count_wheels_change
-
-        move_score = move_score_func(
+        move_score = self.move_score_func(
             adj_matrix=self.adj_matrix,
             neighbors=self.neighbors,
             common_neighbors=self.common_neighbors,
             edge_change=edge_change,
+            num_verts=self.num_verts,
             bad_sizes=self.bad_sizes,
+            binomials=self.binomials,
         )
         return move_score
 
-    def hash_after_move(self, edge_change: tuple[tuple, int, int]) -> int:
+    def hash_after_move(self, edge_change: Sequence[int]) -> int:
         """
         Computes updated graph hash from editing one edge.
 
         Args:
-            edge_change: A tuple of the form
-                (edge, new_color, old_color).
+            edge_change: A move, stored as a sequence of the form
+                (u, v, new_color, old_color).
 
         Returns:
             The hash of the graph that would result from making the
             specified change to the current graph. Does *not* actually
             perform this change (i.e., the original graph is untouched).
         """
-        edge = edge_change[0]
-        new_color = edge_change[1]
-        old_color = edge_change[2]
-
-        # The hash of the graph is defined as the bitwise XOR of the
-        # individual edge/color pairs, so it can be updated in this way.
-        hash_after_move = (
-            self.hash ^ hash((edge, old_color)) ^ hash((edge, new_color))
+        (u, v, new_color, old_color) = edge_change
+
+        # The hash of the graph is defined as the bitwise XOR of keys
+        # for the individual edge/color pairs, so it can be updated by
+        # swapping out the key for this edge.
+        hash_after_move = update_hash(
+            graph_hash=self.hash,
+            edge_idx=edge_index(u, v, num_verts=self.num_verts),
+            new_color=new_color,
+            old_color=old_color,
+            num_verts=self.num_verts,
+            num_colors=self.num_colors,
         )
 
         return hash_after_move
 
-    def make_move(self, edge_change: tuple[tuple, int, int]) -> None:
+    def make_move(self, edge_change: Sequence[int]) -> None:
         """
         Changes the color of one edge.
 
@@ -221,31 +276,35 @@ class RamseyGraph:
         auxillary data (lists of neighbors, the graph's hash, etc.).
 
         Args:
-            edge_change: A tuple of the form
-                (edge, new_color, old_color).
+            edge_change: A move, stored as a sequence of the form
+                (u, v, new_color, old_color).
 
         Returns:
             None
         """
-        edge = edge_change[0]
-        new_color = edge_change[1]
-        old_color = edge_change[2]
+        # Unpack first: "edge_change" may be a row of "self.valid_moves",
+        # which is overwritten below.
+        (u, v, new_color, old_color) = (int(x) for x in edge_change)
+
+        self.hash = self.hash_after_move(edge_change)
 
         # Make move -- remember to keep the adjacency matrix symmetric!
-        self.adj_matrix[edge] = new_color
-        self.adj_matrix[edge[::-1]] = new_color
+        self.adj_matrix[u, v] = new_color
+        self.adj_matrix[v, u] = new_color
 
         # Update possible moves -- the current color is now "new_color",
-        # and we can now move to any *other* color.
-        for color in [c for c in range(self.num_colors) if c != old_color]:
-            self.valid_moves.remove((edge, color, old_color))
-        for color in [c for c in range(self.num_colors) if c != new_color]:
-            self.valid_moves.append((edge, color, new_color))
-
-        self.hash = self.hash_after_move(edge_change)
+        # and we can now move to any *other* color. These moves live in
+        # a fixed block of rows, so we can just overwrite them.
+        num_other_colors = self.num_colors - 1
+        block_start = (
+            edge_index(u, v, num_verts=self.num_verts) * num_other_colors
+        )
+        block = self.valid_moves[block_start : block_start + num_other_colors]
+        block[:, 2] = self.other_colors[new_color]
+        block[:, 3] = new_color
 
         # Update "self.neighbors" and "self.common_neighbors".
-        self.neighbor_update(edge, new_color, old_color)
+        self.neighbor_update((u, v), new_color, old_color)
 
     def neighbor_update(
         self, edge: tuple[int, int], new_color: int, old_color: int
@@ -263,30 +322,72 @@ class RamseyGraph:
         """
         (u, v) = edge
 
-        # Vertices u,v are no longer adjacent in old_color.
-        self.neighbors[old_color, u].remove(v)  # type: ignore
-        self.neighbors[old_color, v].remove(u)  # type: ignore
+        update_neighbors_on_edge(
+            self.neighbors,
+            self.common_neighbors,
+            u,
+            v,
+            new_color,
+            old_color,
+        )
+
+    def run_tabu_steps(
+        self,
+        visited: "HashSet",
+        current_score: int,
+        record_score: int,
+    ) -> tuple[int, int]:
+        """
+        Takes tabu search steps until the score beats a given record.
+
+        Each step makes one of the best-scoring moves that does not lead
+        to a graph in "visited" (chosen uniformly at random), and adds
+        the new graph to "visited". The steps are run in compiled code.
 
-        # Prune common neighbors in old_color. This step is easiest to
-        # understand if you draw a small sketch, and label vertices u,
-        # v, and w.
-        for w in self.neighbors[old_color, u]:
-            self.common_neighbors[old_color, v, w].remove(u)  # type: ignore
+        Args:
+            visited: The hashes of all graphs visited so far.
+            current_score: The score of the graph.
+            record_score: The lowest score seen so far. At least one
+                step is always taken.
 
-        for w in self.neighbors[old_color, v]:
-            self.common_neighbors[old_color, u, w].remove(v)  # type: ignore
+        Returns:
+            A tuple containing the new score of the graph, and the number
+            of steps taken.
+        """
+        steps = 0
+        # These don't change between calls below, so look them up once.
+        bad_sizes = np.array(self.bad_sizes)
+        books = self.bad_subgraph == "books"
+        keys = zobrist_table(
+            num_verts=self.num_verts, num_colors=self.num_colors
+        )
 
-        # Add common neighbors in new_color. Again, this is easiset to
-        # understand by drawing a picture.
-        for w in self.neighbors[new_color, u]:
-            self.common_neighbors[new_color, v, w].add(u)  # type: ignore
+        while True:
+            # The compiled steps stop early whenever the table of visited
+            # hashes needs to grow.
+            visited.make_room()
+            (graph_hash, visited.size, current_score, new_steps) = tabu_steps(
+                self.adj_matrix,
+                self.neighbors,
+                self.common_neighbors,
+                self.valid_moves,
+                bad_sizes,
+                books,
+                self.binomials,
+                keys,
+                np.uint64(self.hash),
+                visited.table,
+                visited.size,
+                current_score,
+                record_score,
+            )
+            self.hash = int(graph_hash)
+            steps += new_steps
 
-        for w in self.neighbors[new_color, v]:
-            self.common_neighbors[new_color, u, w].add(v)  # type: ignore
+            if current_score < record_score:
+                break
 
-        # Vertices u,v are now adjacent in new_color.
-        self.neighbors[new_color, u].add(v)  # type: ignore
-        self.neighbors[new_color, v].add(u)  # type: ignore
+        return current_score, steps
 
     def save(self, **kwargs: dict[str, Any]) -> None:
         """
@@ -328,3 +429,54 @@ class RamseyGraph:
         # no error will be raised if we try to save it twice.
         except FileExistsError:
             pass
+
+
+class HashSet:
+    """
+    A set of 64-bit graph hashes.
+
+    Hashes are stored in an open-addressed table with linear probing,
+    which is kept at most a quarter full (doubling in size as needed).
+    Unlike a Python set, the table can be handed directly to compiled
+    code (see "RamseyGraph.run_tabu_steps"), which tests and inserts hashes
+    itself.
+
+    Attributes:
+        table (array of uint64): The slots of the table, with 0 marking
+            an empty slot. Its length is always a power of 2.
+
+        size (int): The number of hashes stored.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        if capacity & (capacity - 1) or capacity < 1:
+            raise ValueError("Capacity must be a power of 2.")
+
+        self.table = np.zeros(capacity, dtype=np.uint64)
+        self.size = 0
+
+    def add(self, graph_hash: int) -> None:
+        """
+        Adds a hash to the set.
+
+        Args:
+            graph_hash: A 64-bit graph hash.
+
+        Returns:
+            None
+        """
+        self.make_room()
+        self.size += hash_table_insert(self.table, np.uint64(graph_hash))
+
+    def make_room(self) -> None:
+        """
+        Enlarges the table, if needed, so that one more hash fits.
+
+        The table is kept at most a quarter full, so that probe
+        sequences stay short.
+
+        Returns:
+            None
+        """
+        while 4 * (self.size + 1) > len(self.table):
+            self.table = hash_table_grow(self.table)
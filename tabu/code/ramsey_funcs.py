@@ -5,6 +5,10 @@ Includes most of the underlying "machinery" for the RamseyGraph class,
 including scoring/subgraph counting functions, and various functions
 used in initializing RamseyGraph instances.
 
+Where compiled (Numba) functions are called from Python code in the
+search, their arguments are passed positionally, as that is cheaper
+than binding keyword arguments.
+
 Authorship:
     This code was written by Gwen McKinley, in support of the paper
     "Small Ramsey numbers for books, wheels, and generalizations" by
@@ -14,10 +18,32 @@ Authorship:
 
 import math
 from functools import cache
-from itertools import combinations
-from typing import Any, Callable, TypeVar
+from typing import Any, Callable, Sequence, TypeVar
 
 import numpy as np
+from numba import njit, prange
+
+
+@cache
+def binomial_table(max_n: int, max_k: int) -> np.ndarray:
+    """
+    Tabulates binomial coefficients.
+
+    Args:
+        max_n: The largest "n" to include.
+        max_k: The largest "k" to include.
+
+    Returns:
+        An array of 64-bit integers, where the entry at indices [k, n]
+        is the binomial coefficient "n choose k" (which is 0 if k > n).
+    """
+    return np.array(
+        [
+            [math.comb(n, k) for n in range(max_n + 1)]
+            for k in range(max_k + 1)
+        ],
+        dtype=np.int64,
+    )
 
 
 def common_neighbors(
@@ -28,29 +54,22 @@ def common_neighbors(
 
     Args:
         neighbors: An array storing the neighborhood of each
-            vertex of an edge-colored graph in each color.
+            vertex of an edge-colored graph in each color, as bitmasks.
         num_verts: The number of vertices in the graph.
         num_colors: The number of possible edge-colors.
 
     Returns:
         An array storing the set of common neighbors of each pair of
-        vertices of the graph, in each color. Indexed by colors and
-        vertices: the entry at indices [c, i, j] is the set of common
-        neighbors of vertex i and vertex j in color c.
+        vertices of the graph, in each color, as bitmasks. Indexed by
+        colors and pairs of vertices: bit w of the entry at indices
+        [c, edge_index(i, j, num_verts)] is set iff w is a common
+        neighbor of vertex i and vertex j in color c. (Common
+        neighborhoods are symmetric, so each pair is stored only once.)
     """
-    common_nbhds = np.empty((num_colors, num_verts, num_verts), dtype=object)
-
-    for i, j in combinations(range(num_verts), 2):
-        for color in range(num_colors):
-            common_nbhds[color, i, j] = neighbors[color, i].intersection(
-                neighbors[color, j]
-            )
-            # Populate the array symmetrically for vertex pairs -- note
-            # that since sets are mutable, updating the array later on
-            # for i,j will cause an update for j,i as well. This is
-            # convenient, and means we never have to worry about the
-            # order of pairs of vertices.
-            common_nbhds[color, j, i] = common_nbhds[color, i, j]
+    # Intersecting bitmasks is a single bitwise AND, so we can compute
+    # every pair at once.
+    i, j = edge_pairs(num_verts)
+    common_nbhds = neighbors[:, i] & neighbors[:, j]
 
     return common_nbhds
 
@@ -60,6 +79,7 @@ def count_books(
     common_neighbors: np.ndarray,
     num_verts: int,
     bad_sizes: list[int],
+    binomials: np.ndarray,
     **_,
 ) -> int:
     """
@@ -70,9 +90,11 @@ def count_books(
             (entries = edge-colors)
         common_neighbors: An array storing the set of common
             neighbors of each pair of vertices in the graph, in each
-            color.
+            color, as bitmasks.
         num_verts: The number of vertices in the graph.
         bad_sizes: The size of books being counted in each color.
+        binomials: A table of binomial coefficients (see
+            "binomial_table") covering every book size being counted.
 
     Returns:
         The number of monochromatic books in the graph, with sizes
@@ -80,24 +102,28 @@ def count_books(
         it will count the number of 4-vertex books in color 0, plus
         the number of 5-vertex books in color 1.
     """
-    num_books = 0
+    # Choose a "spine" edge (u, v) -- all of them at once, as arrays of
+    # endpoints -- along with the color of each spine.
+    u, v = edge_pairs(num_verts)
+    colors = adj_matrix[u, v]
 
-    # Choose a "spine" edge (u, v).
-    for u, v in combinations(range(num_verts), 2):
-        color = adj_matrix[u, v]
-        # Choose the remaining "pages" of the book from among common
-        # neighbors of u and v.
-        num_common_nbrs = len(common_neighbors[color, u, v])
-        books_on_edge = my_comb(num_common_nbrs, bad_sizes[color] - 2)
-        num_books += books_on_edge
+    # Choose the remaining "pages" of the book from among common
+    # neighbors of u and v, looking up the number of ways to do this in
+    # the table of binomial coefficients.
+    spines = np.arange(len(u))
+    num_common_nbrs = np.bitwise_count(common_neighbors[colors, spines])
+    num_pages = np.asarray(bad_sizes)[colors] - 2
+    num_books = binomials[num_pages, num_common_nbrs].sum()
 
-    return num_books
+    return int(num_books)
 
 
 def count_books_change(
     common_neighbors: np.ndarray,
-    edge_change: tuple[tuple, int, int],
+    edge_change: Sequence[int],
+    num_verts: int,
     bad_sizes: list[int],
+    binomials: np.ndarray,
     **_,
 ) -> int:
     """
@@ -106,43 +132,99 @@ def count_books_change(
     Args:
         common_neighbors: An array storing the common neighbors of
             each pair of vertices in an edge-colored graph, in each
-            color.
-        edge_change: A tuple of the form (edge, new_color, old_color).
+            color, as bitmasks.
+        edge_change: A move, stored as a sequence of the form
+            (u, v, new_color, old_color).
+        num_verts: The number of vertices in the graph.
         bad_sizes: The size of books being counted in each color.
+        binomials: A table of binomial coefficients (see
+            "binomial_table") covering every book size being counted.
 
     Returns:
         The change in the number of number of monochromatic books in the
         graph that would result from changing the specified edge from
         "old_color" to "new_color."
     """
-    (u, v) = edge_change[0]
-    new_color = edge_change[1]
-    old_color = edge_change[2]
+    (u, v, new_color, old_color) = edge_change
+
+    return count_books_change_nb(
+        common_neighbors,
+        num_verts,
+        u,
+        v,
+        new_color,
+        old_color,
+        bad_sizes[new_color],
+        bad_sizes[old_color],
+        binomials,
+    )
+
+
+@njit(cache=True)
+def count_books_change_nb(  # noqa: PLR0913
+    common_neighbors: np.ndarray,
+    num_verts: int,
+    u: int,
+    v: int,
+    new_color: int,
+    old_color: int,
+    new_size: int,
+    old_size: int,
+    binomials: np.ndarray,
+) -> int:
+    """
+    Compiled core of "count_books_change."
 
-    new_size = bad_sizes[new_color]
-    old_size = bad_sizes[old_color]
+    Args:
+        common_neighbors: An array storing the common neighbors of
+            each pair of vertices in an edge-colored graph, in each
+            color, as bitmasks.
+        num_verts: The number of vertices in the graph.
+        u, v: The endpoints of the edge being changed.
+        new_color: The color the edge would be changed to.
+        old_color: The current color of the edge.
+        new_size: The size of books being counted in "new_color".
+        old_size: The size of books being counted in "old_color".
+        binomials: A table of binomial coefficients (see
+            "binomial_table") covering every book size being counted.
 
-    new_nbrs = common_neighbors[new_color, u, v]
-    old_nbrs = common_neighbors[old_color, u, v]
+    Returns:
+        The change in the number of number of monochromatic books in the
+        graph that would result from changing the edge (u,v) from
+        "old_color" to "new_color."
+    """
+    uv_index = edge_index(u, v, num_verts)
+    new_nbrs = common_neighbors[new_color, uv_index]
+    old_nbrs = common_neighbors[old_color, uv_index]
 
     # Score change from books with (u,v) as the spine.
-    delta = my_comb(len(new_nbrs), new_size - 2)
-    delta -= my_comb(len(old_nbrs), old_size - 2)
+    delta = binomials[new_size - 2, popcount(new_nbrs)]
+    delta -= binomials[old_size - 2, popcount(old_nbrs)]
 
     # Count new books with (u,v) incident to a "page."
-    for w in new_nbrs:
+    w_choices = new_nbrs
+    while w_choices:
+        w = lowest_vtx(w_choices)
+        w_choices &= w_choices - np.uint64(1)
         # Choose one of u, v to form the spine with w, and the other
         # will be the "page" vertex.
-        for spine_vtx in u, v:
+        for spine_vtx in (u, v):
             # Count new books with (spine_vtx,w) as the "spine."
-            num_other_pages = len(common_neighbors[new_color, spine_vtx, w])
-            delta += my_comb(num_other_pages, new_size - 3)
+            num_other_pages = popcount(
+                common_neighbors[
+                    new_color, edge_index(spine_vtx, w, num_verts)
+                ]
+            )
+            delta += binomials[new_size - 3, num_other_pages]
 
     # Count old books with (u,v) incident to a "page."
-    for w in old_nbrs:
+    w_choices = old_nbrs
+    while w_choices:
+        w = lowest_vtx(w_choices)
+        w_choices &= w_choices - np.uint64(1)
         # Choose one of u, v to form the spine with w, and the other
         # will be the "page" vertex.
-        for spine_vtx in u, v:
+        for spine_vtx in (u, v):
             # Count old books with (spine_vtx,w) as the "spine." Note
             # that since u, v, and w are all adjacent in "old_color"
             # (i.e., the current color of the graph), the remaining
@@ -151,125 +233,156 @@ def count_books_change(
             # care not to double-count it as a "page." This is the
             # reason we subtract 1 in "num_other_pages."
             num_other_pages = (
-                len(common_neighbors[old_color, spine_vtx, w]) - 1
+                popcount(
+                    common_neighbors[
+                        old_color, edge_index(spine_vtx, w, num_verts)
+                    ]
+                )
+                - 1
             )
-            delta -= my_comb(num_other_pages, old_size - 3)
+            delta -= binomials[old_size - 3, num_other_pages]
 
     return delta
 
 
+@njit(cache=True)
 def count_cycles_restricted(
-    adj_matrix: np.ndarray,
     cycle_length: int,
     color: int,
-    possible_vtxs: set,
+    possible_vtxs: np.uint64,
     neighbors: np.ndarray,
 ) -> int:
-    num_cycles = 0
     """
     Counts cycles induced on a given set of vertices.
 
     Args:
-        adj_matrix: The adjacency matrix of an edge-colored graph.
-            (entries = edge colors)
         cycle_length: The length of cycles to be counted.
         color: The edge-color of the cycles to be counted.
-        possible_vtxs: A subset of the vertices of the graph.
+        possible_vtxs: A subset of the vertices of the graph, as a
+            bitmask.
         neighbors: An array storing the neighborhood of each vertex
-            in the graph, in each color.
+            in the graph, in each color, as bitmasks.
 
 
     Returns:
         The number of cycles in the graph (of length "cycle_length" and
         edge-color "color") induced on the set "possible_vtxs."
     """
+    num_cycles = 0
 
-    # Make a copy to avoid mutating the set outside the function call.
-    possible_vtxs_copy = set(possible_vtxs)
-
-    while len(possible_vtxs_copy) >= cycle_length - 1:
+    # Vertices are removed from the pool one at a time by clearing their
+    # bits, so no copy of the caller's set is ever needed.
+    remaining_vtxs = possible_vtxs
+    while popcount(remaining_vtxs) >= cycle_length - 1:
         # Fix a vertex in the cycle, to avoid rotation symmetry.
-        vtx = possible_vtxs_copy.pop()
+        vtx = lowest_vtx(remaining_vtxs)
+        remaining_vtxs &= remaining_vtxs - np.uint64(1)
 
         # Choose the neighbors of the first vertex, in a canonical order
-        # to avoid reflection symmetry.
-        for s, t in combinations(
-            possible_vtxs_copy.intersection(neighbors[color, vtx]), 2
-        ):
-            # Count ways to commplete the cycle.
-            num_cycles += count_paths_s_to_t(
-                s=s,
-                t=t,
-                color=color,
-                possible_vtxs=possible_vtxs_copy.difference({s, t}),
-                adj_matrix=adj_matrix,
-                neighbors=neighbors,
-                num_internal_vtxs=cycle_length - 3,
-            )
+        # (s < t) to avoid reflection symmetry.
+        s_choices = remaining_vtxs & neighbors[color, vtx]
+        while s_choices:
+            s_bit = s_choices & -s_choices
+            s_choices ^= s_bit
+            t_choices = s_choices
+            while t_choices:
+                t_bit = t_choices & -t_choices
+                t_choices ^= t_bit
+
+                # Count ways to commplete the cycle.
+                num_cycles += count_paths_s_to_t(
+                    s=lowest_vtx(s_bit),
+                    t=lowest_vtx(t_bit),
+                    color=color,
+                    possible_vtxs=remaining_vtxs & ~(s_bit | t_bit),
+                    neighbors=neighbors,
+                    num_internal_vtxs=cycle_length - 3,
+                )
 
     return num_cycles
 
 
+@njit(cache=True)
 def count_paths_s_t_middle(  # noqa: PLR0913
     s: int,
     t: int,
-    internal_vtxs: set,
+    internal_vtxs: np.uint64,
     color: int,
     neighbors: np.ndarray,
-    adj_matrix: np.ndarray,
     num_internal_vtxs: int,
 ) -> int:
     """
-    Counts paths from s to t with a given set of internal vertices.
+    Counts paths from s to t with internal vertices from a given set.
 
     Args:
         s: A vertex in the graph (starting point).
         t: A vertex in the graph (ending point).
-        internal_vtxs: A subset of the vertices of the graph.
+        internal_vtxs: A subset of the vertices of the graph, as a
+            bitmask.
         color: The edge-color of the paths to be counted.
-        adj_matrix: The adjacency matrix of an edge-colored graph.
-            (entries = edge colors)
         neighbors: An array storing the neighborhood of each vertex
-            in the graph, in each color.
+            in the graph, in each color, as bitmasks.
         num_internal_vertices: The number of internal vertices in the
             paths to be counted.
 
 
     Returns:
         The number of monochromatic paths (of color "color") from s to t
-        in the graph, with precisely the set "internal_vtxs" as the
+        in the graph, having "num_internal_vtxs" internal vertices, all
+        of which belong to the set "internal_vtxs." In particular, if
+        "internal_vtxs" has exactly "num_internal_vtxs" elements, these
+        are the paths with precisely the set "internal_vtxs" as the
         internal vertices (in *some* order).
     """
     # If there are no internal vertices, we just need to test whether s
     # and t are adjacent (a "path" between them is just an edge).
     if num_internal_vtxs == 0:
-        return adj_matrix[s, t] == color
+        return 1 if neighbors[color, s] & (np.uint64(1) << t) else 0
+
+    # With one internal vertex, every possible choice of that vertex
+    # gives its own subproblem -- but they can all be settled at once:
+    # the paths correspond exactly to common neighbors of s and t.
+    elif num_internal_vtxs == 1:
+        return popcount(
+            internal_vtxs & neighbors[color, s] & neighbors[color, t]
+        )
+
+    # Too few vertices left to fill the path, or no way to step off
+    # s or onto t: either way, there's nothing to count.
+    elif (
+        popcount(internal_vtxs) < num_internal_vtxs
+        or not internal_vtxs & neighbors[color, s]
+        or not internal_vtxs & neighbors[color, t]
+    ):
+        return 0
 
     else:
         total_paths = 0
         # Assign a vertex to be the "last" internal vertex (i.e., to be
         # adjacent to t on the path), then recurse: count the (slightly
         # shorter) paths from s to that guy.
-        for last_vtx in internal_vtxs.intersection(neighbors[color, t]):
+        last_choices = internal_vtxs & neighbors[color, t]
+        while last_choices:
+            last_bit = last_choices & -last_choices
+            last_choices ^= last_bit
             total_paths += count_paths_s_t_middle(
                 s=s,
-                t=last_vtx,
-                internal_vtxs=internal_vtxs.difference({last_vtx}),
+                t=lowest_vtx(last_bit),
+                internal_vtxs=internal_vtxs ^ last_bit,
                 color=color,
                 neighbors=neighbors,
-                adj_matrix=adj_matrix,
                 num_internal_vtxs=num_internal_vtxs - 1,
             )
 
         return total_paths
 
 
+@njit(cache=True)
 def count_paths_s_to_t(  # noqa: PLR0913
     s: int,
     t: int,
     color: int,
-    possible_vtxs: set,
-    adj_matrix: np.ndarray,
+    possible_vtxs: np.uint64,
     neighbors: np.ndarray,
     num_internal_vtxs: int,
 ) -> int:
@@ -280,11 +393,10 @@ def count_paths_s_to_t(  # noqa: PLR0913
         s: A vertex in the graph (starting point).
         t: A vertex in the graph (ending point).
         color: The edge-color of the paths to be counted.
-        possible_vtxs: A subset of the vertices of the graph.
-        adj_matrix: The adjacency matrix of an edge-colored graph.
-            (entries = edge colors)
+        possible_vtxs: A subset of the vertices of the graph, as a
+            bitmask.
         neighbors: An array storing the neighborhood of each vertex
-            in the graph, in each color.
+            in the graph, in each color, as bitmasks.
         num_internal_vertices: The number of internal vertices of the
             paths to be counted.
 
@@ -294,27 +406,25 @@ def count_paths_s_to_t(  # noqa: PLR0913
         in the graph, having "num_internal_vtxs" internal vertices, all
         of which belong to the set "possible_vtxs."
     """
-    total_paths = 0
-
-    # Break down the number of paths from s to t according to the set of
-    # internal vertices on the path. (Note that more than one path can
-    # have the same set of internal vertices, in different orders.)
-    for internal_vtxs in combinations(possible_vtxs, num_internal_vtxs):
-        total_paths += count_paths_s_t_middle(
-            s=s,
-            t=t,
-            internal_vtxs=set(internal_vtxs),
-            color=color,
-            neighbors=neighbors,
-            adj_matrix=adj_matrix,
-            num_internal_vtxs=num_internal_vtxs,
-        )
-
-    return total_paths
+    # Breaking down the paths from s to t according to their set of
+    # internal vertices, and then counting the orderings of each set,
+    # amounts to the same thing as building the paths one vertex at a
+    # time from all of "possible_vtxs" -- so we can skip enumerating
+    # the sets of internal vertices entirely.
+    if popcount(possible_vtxs) < num_internal_vtxs:
+        return 0
+
+    return count_paths_s_t_middle(
+        s=s,
+        t=t,
+        internal_vtxs=possible_vtxs,
+        color=color,
+        neighbors=neighbors,
+        num_internal_vtxs=num_internal_vtxs,
+    )
 
 
 def count_wheels(
-    adj_matrix: np.ndarray,
     neighbors: np.ndarray,
     num_verts: int,
     num_colors: int,
@@ -325,10 +435,8 @@ def count_wheels(
     Counts monochromatic "wheels" in an edge-colored graph.
 
     Args:
-        adj_matrix: The adjacency matrix of an edge-colored graph.
-            (entries = edge-colors)
         neighbors: An array storing the neighborhood of each
-            vertex in the graph, in each color.
+            vertex in the graph, in each color, as bitmasks.
         num_verts: The number of vertices in the graph.
         bad_sizes: The sizes of wheels being counted in each color.
             Assumes wheels of size 5 or more (otherwise wheels =
@@ -343,27 +451,32 @@ def count_wheels(
     """
     num_wheels = 0
 
+    # Restrict every neighborhood to the neighborhood of each possible
+    # center vertex, all at once: induced_nbrs[c, x] is the subgraph
+    # (in color c) induced on the neighbors of x.
+    induced_nbrs = np.ascontiguousarray(
+        (neighbors[:, :, None] & neighbors[:, None, :]).swapaxes(0, 1)
+    )
+
     for center_vtx in range(num_verts):
         for color in range(num_colors):
             # For a given "center vertex" and a given edge color, the
             # number of wheels is simply equal the number of cycles in
             # the neighborhood of that center vertex.
             num_wheels += count_cycles_restricted(
-                adj_matrix=adj_matrix,
-                cycle_length=bad_sizes[color] - 1,
-                color=color,
-                possible_vtxs=neighbors[color, center_vtx],
-                neighbors=neighbors,
+                bad_sizes[color] - 1,
+                color,
+                neighbors[color, center_vtx],
+                induced_nbrs[center_vtx],
             )
 
     return num_wheels
 
 
 def count_wheels_change(
-    adj_matrix: np.ndarray,
     neighbors: np.ndarray,
     common_neighbors: np.ndarray,
-    edge_change: tuple[tuple, int, int],
+    edge_change: Sequence[int],
     bad_sizes: list[int],
     **_,
 ) -> int:
@@ -371,14 +484,13 @@ def count_wheels_change(
     Score change function for "wheels."
 
     Args:
-        adj_matrix: The adjacency matrix of an edge-colored graph.
-            (entries = edge-colors)
         neighbors: An array storing the neighborhood of each
-            vertex in the graph, in each color.
+            vertex in the graph, in each color, as bitmasks.
         common_neighbors: An array storing the common neighbors of
             each pair of vertices in an edge-colored graph, in each
-            color.
-        edge_change: A tuple of the form (edge, new_color, old_color).
+            color, as bitmasks.
+        edge_change: A move, stored as a sequence of the form
+            (u, v, new_color, old_color).
         bad_sizes: The size of wheels being counted in each color.
 
     Returns:
@@ -386,110 +498,311 @@ def count_wheels_change(
         the graph that would result from changing the specified edge
         from "old_color" to "new_color."
     """
-    (u, v) = edge_change[0]
-    new_color = edge_change[1]
-    old_color = edge_change[2]
+    (u, v, new_color, old_color) = edge_change
+
+    return count_wheels_change_nb(
+        neighbors,
+        common_neighbors,
+        u,
+        v,
+        new_color,
+        old_color,
+        bad_sizes[new_color],
+        bad_sizes[old_color],
+    )
+
+
+@njit(cache=True)
+def count_wheels_change_nb(  # noqa: PLR0913
+    neighbors: np.ndarray,
+    common_neighbors: np.ndarray,
+    u: int,
+    v: int,
+    new_color: int,
+    old_color: int,
+    new_size: int,
+    old_size: int,
+) -> int:
+    """
+    Compiled core of "count_wheels_change."
 
-    new_size = bad_sizes[new_color]
-    old_size = bad_sizes[old_color]
+    Args:
+        neighbors: An array storing the neighborhood of each
+            vertex in the graph, in each color, as bitmasks.
+        common_neighbors: An array storing the common neighbors of
+            each pair of vertices in an edge-colored graph, in each
+            color, as bitmasks.
+        u, v: The endpoints of the edge being changed.
+        new_color: The color the edge would be changed to.
+        old_color: The current color of the edge.
+        new_size: The size of wheels being counted in "new_color".
+        old_size: The size of wheels being counted in "old_color".
+
+    Returns:
+        The change in the number of number of monochromatic wheels in
+        the graph that would result from changing the edge (u,v) from
+        "old_color" to "new_color."
+    """
+    u_bit = np.uint64(1) << u
+    v_bit = np.uint64(1) << v
 
-    new_kwargs = {
-        "color": new_color,
-        "adj_matrix": adj_matrix,
-        "neighbors": neighbors,
-    }
-    old_kwargs = {
-        "color": old_color,
-        "adj_matrix": adj_matrix,
-        "neighbors": neighbors,
-    }
+    uv_index = edge_index(u, v, neighbors.shape[1])
+    new_nbrs = common_neighbors[new_color, uv_index]
+    old_nbrs = common_neighbors[old_color, uv_index]
 
     delta = 0
 
     # Count new wheels where (u,v) is on the "rim."
-    for center_vtx in common_neighbors[new_color, u, v]:
+    center_choices = new_nbrs
+    while center_choices:
+        center_bit = center_choices & -center_choices
+        center_choices ^= center_bit
         delta += count_paths_s_to_t(
             s=u,
             t=v,
-            possible_vtxs=neighbors[new_color, center_vtx].difference({u, v}),
+            color=new_color,
+            possible_vtxs=neighbors[new_color, lowest_vtx(center_bit)]
+            & ~(u_bit | v_bit),
+            neighbors=neighbors,
             num_internal_vtxs=new_size - 3,
-            **new_kwargs,
         )
 
     # Count old wheels where (u,v) is on the "rim."
-    for center_vtx in common_neighbors[old_color, u, v]:
+    center_choices = old_nbrs
+    while center_choices:
+        center_bit = center_choices & -center_choices
+        center_choices ^= center_bit
         delta -= count_paths_s_to_t(
             s=u,
             t=v,
-            possible_vtxs=neighbors[old_color, center_vtx].difference({u, v}),
+            color=old_color,
+            possible_vtxs=neighbors[old_color, lowest_vtx(center_bit)]
+            & ~(u_bit | v_bit),
+            neighbors=neighbors,
             num_internal_vtxs=old_size - 3,
-            **old_kwargs,
         )
 
     # Count new wheels where u or v is the center vertex.
-    for center_vtx in u, v:
+    for center_vtx in (u, v):
         # Choose the two "rim vertices" that adjoin both u and v.
-        for s, t in combinations(common_neighbors[new_color, u, v], 2):
-            # Count ways to complete the "rim."
-            delta += count_paths_s_to_t(
-                s=s,
-                t=t,
-                possible_vtxs=neighbors[new_color, center_vtx].difference(
-                    {s, t}
-                ),
-                num_internal_vtxs=new_size - 4,
-                **new_kwargs,
-            )
+        s_choices = new_nbrs
+        while s_choices:
+            s_bit = s_choices & -s_choices
+            s_choices ^= s_bit
+            t_choices = s_choices
+            while t_choices:
+                t_bit = t_choices & -t_choices
+                t_choices ^= t_bit
+                # Count ways to complete the "rim."
+                delta += count_paths_s_to_t(
+                    s=lowest_vtx(s_bit),
+                    t=lowest_vtx(t_bit),
+                    color=new_color,
+                    possible_vtxs=neighbors[new_color, center_vtx]
+                    & ~(s_bit | t_bit),
+                    neighbors=neighbors,
+                    num_internal_vtxs=new_size - 4,
+                )
 
     # Count old wheels where u or v is the center vertex.
-    for center_vtx in u, v:
+    for center_vtx in (u, v):
         # Choose the two "rim vertices" that adjoin both u and v.
-        for s, t in combinations(common_neighbors[old_color, u, v], 2):
-            # Count ways to complete the "rim."
-            delta -= count_paths_s_to_t(
-                s=s,
-                t=t,
-                possible_vtxs=neighbors[old_color, center_vtx].difference(
-                    {u, v, s, t}
-                ),
-                num_internal_vtxs=old_size - 4,
-                **old_kwargs,
-            )
+        s_choices = old_nbrs
+        while s_choices:
+            s_bit = s_choices & -s_choices
+            s_choices ^= s_bit
+            t_choices = s_choices
+            while t_choices:
+                t_bit = t_choices & -t_choices
+                t_choices ^= t_bit
+                # Count ways to complete the "rim."
+                delta -= count_paths_s_to_t(
+                    s=lowest_vtx(s_bit),
+                    t=lowest_vtx(t_bit),
+                    color=old_color,
+                    possible_vtxs=neighbors[old_color, center_vtx]
+                    & ~(u_bit | v_bit | s_bit | t_bit),
+                    neighbors=neighbors,
+                    num_internal_vtxs=old_size - 4,
+                )
 
     return delta
 
 
-def hash_adj_matrix(adj_matrix: np.ndarray, num_verts: int) -> int:
+@njit(cache=True)
+def edge_index(i: int, j: int, num_verts: int) -> int:
+    """
+    Finds the position of an edge in the list of all edges.
+
+    Args:
+        i, j: The endpoints of an edge (in either order).
+        num_verts: The number of vertices in the graph.
+
+    Returns:
+        The index of the edge (i,j) when the edges of the complete graph
+        are listed in lexicographic order, i.e., the order produced by
+        "edge_pairs".
+    """
+    if i > j:
+        i, j = j, i
+
+    return i * (2 * num_verts - i - 1) // 2 + (j - i - 1)
+
+
+@cache
+def edge_pairs(num_verts: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lists the edges of the complete graph.
+
+    This replaces looping over combinations(range(num_verts), 2): the
+    arrays can be used directly in vectorized code, and are computed
+    only once for each graph size.
+
+    Args:
+        num_verts: The number of vertices in the graph.
+
+    Returns:
+        A tuple (I, J) of read-only arrays, such that the edges of the
+        complete graph, in lexicographic order, are (I[e], J[e]).
+    """
+    edges = np.triu_indices(num_verts, 1)
+
+    # The arrays are shared by every caller, so make sure none of them
+    # can accidentally modify them.
+    for endpoints in edges:
+        endpoints.setflags(write=False)
+
+    return edges
+
+
+def hash_adj_matrix(
+    adj_matrix: np.ndarray, num_verts: int, num_colors: int
+) -> int:
     """
     Hash function for adjacency matrix of an edge-colored graph.
 
     This is a custom hash function to allow quick updating if an edge of
     the graph is edited (instead of having to re-hash the entire
     graph/adjacency matrix). It computes the hash of the graph as the
-    bitwise XOR of hashes of the individual edges (defined by indices
-    and color).
+    bitwise XOR of random 64-bit keys for the individual edges (one key
+    for each edge and color -- i.e., Zobrist hashing).
 
     Args:
         adj_matrix: The adjacency matrix of an edge-colored graph.
             (entries = edge-colors)
         num_verts: The number of vertices in the graph
+        num_colors: The number of possible edge-colors.
 
     Returns:
         A hash of the adjacency matrix.
     """
-    total_hash = 0
-    for i, j in combinations(range(num_verts), 2):
-        edge_color = ((i, j), adj_matrix[i, j])
-        total_hash ^= hash(edge_color)
+    keys = zobrist_table(num_verts=num_verts, num_colors=num_colors)
 
-    return total_hash
+    # Look up the key of every edge in its current color. Edges are
+    # listed in the same order as in "edge_index".
+    i, j = edge_pairs(num_verts)
+    edge_keys = keys[np.arange(len(i)), adj_matrix[i, j]]
 
+    return int(np.bitwise_xor.reduce(edge_keys))
 
-@cache
-def my_comb(n: int, k: int) -> int:
-    """Speeds up math.comb (binomial coefficient function) by caching"""
 
-    return math.comb(n, k)
+@njit(cache=True)
+def hash_table_contains(table: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    """
+    Tests which of several hashes are stored in an open-addressed table.
+
+    Args:
+        table: A hash table, as filled by "hash_table_insert". Its length
+            must be a power of 2.
+        hashes: An array of 64-bit hashes to look up.
+
+    Returns:
+        An array of booleans, whose i-th entry is True iff hashes[i] is
+        stored in the table.
+    """
+    mask = np.uint64(len(table) - 1)
+    found = np.zeros(len(hashes), dtype=np.bool_)
+
+    for i in range(len(hashes)):
+        # Zero marks an empty slot, so a hash of zero is stored as one.
+        key = hashes[i] if hashes[i] else np.uint64(1)
+
+        # Probe consecutive slots, starting from the one given by the
+        # low bits of the hash, until we find the key or an empty slot.
+        slot = key & mask
+        while table[slot]:
+            if table[slot] == key:
+                found[i] = True
+                break
+            slot = (slot + np.uint64(1)) & mask
+
+    return found
+
+
+@njit(cache=True)
+def hash_table_grow(table: np.ndarray) -> np.ndarray:
+    """
+    Copies an open-addressed hash table into one twice the size.
+
+    Args:
+        table: A hash table, as filled by "hash_table_insert".
+
+    Returns:
+        A new table, twice the length of "table", storing the same
+        hashes.
+    """
+    new_table = np.zeros(2 * len(table), dtype=np.uint64)
+    for key in table:
+        if key:
+            hash_table_insert(new_table, key)
+
+    return new_table
+
+
+@njit(cache=True)
+def hash_table_insert(table: np.ndarray, graph_hash: np.uint64) -> bool:
+    """
+    Adds a hash to an open-addressed table (in place).
+
+    Args:
+        table: A hash table, stored as an array of 64-bit slots (0 for
+            empty). Its length must be a power of 2, and it must have at
+            least one empty slot.
+        graph_hash: The 64-bit hash to add.
+
+    Returns:
+        True if the hash was added, or False if it was already stored.
+    """
+    mask = np.uint64(len(table) - 1)
+
+    # Zero marks an empty slot, so a hash of zero is stored as one.
+    key = graph_hash if graph_hash else np.uint64(1)
+
+    slot = key & mask
+    while table[slot]:
+        if table[slot] == key:
+            return False
+        slot = (slot + np.uint64(1)) & mask
+
+    table[slot] = key
+
+    return True
+
+
+@njit(cache=True)
+def lowest_vtx(mask: np.uint64) -> int:
+    """
+    Finds the smallest vertex in a nonempty set stored as a bitmask.
+
+    Args:
+        mask: A nonempty set of vertices, stored as a bitmask.
+
+    Returns:
+        The index of the lowest set bit of "mask."
+    """
+    # Isolating the lowest set bit and subtracting one leaves a block
+    # of ones below it, whose size is the index of that bit.
+    return popcount((mask & -mask) - np.uint64(1))
 
 
 def neighbors(
@@ -506,26 +819,48 @@ def neighbors(
 
     Returns:
         An array storing the set of neighbors of each vertex of the
-        graph in each color. Indexed by colors and vertices: the entry
-        at indices [c, v] is the set of neighbors of vertex v in color
-        c.
-    """
-    # Initialize each neighborhood in each color to be an empty set
-    # (taking some care to ensure they are not the *same* set, and can
-    # be edited independently).
-    neighbors = np.array(
-        [set() for _ in range(num_colors * num_verts)]
-    ).reshape((num_colors, num_verts))
-
-    # Populate neighborhoods from adjacency matrix.
-    for i, j in combinations(range(num_verts), 2):
-        color = adj_matrix[i, j]
-        neighbors[color, i].add(j)
-        neighbors[color, j].add(i)
+        graph in each color, as bitmasks. Indexed by colors and
+        vertices: bit w of the entry at indices [c, v] is set iff w is
+        a neighbor of vertex v in color c. (This requires the graph to
+        have at most 64 vertices.)
+    """
+    # Compare the adjacency matrix against every color at once:
+    # is_color[c, i, j] is True iff edge (i,j) has color c. The diagonal
+    # is not an edge (even though its entries are 0), so clear it.
+    is_color = adj_matrix[None, :, :] == np.arange(num_colors)[:, None, None]
+    is_color[:, np.arange(num_verts), np.arange(num_verts)] = False
+
+    # Populate neighborhoods from adjacency matrix: row i of each color
+    # becomes a bitmask by OR-ing together the bits of its True entries.
+    bits = np.left_shift(np.uint64(1), np.arange(num_verts, dtype=np.uint64))
+    neighbors = np.bitwise_or.reduce(
+        np.where(is_color, bits, np.uint64(0)), axis=2
+    )
 
     return neighbors
 
 
+@njit(cache=True)
+def popcount(mask: np.uint64) -> int:
+    """
+    Counts the vertices in a set stored as a bitmask.
+
+    Args:
+        mask: A set of vertices, stored as a bitmask.
+
+    Returns:
+        The number of set bits in "mask."
+    """
+    count = 0
+    # Clear the lowest set bit until none are left. (LLVM recognizes
+    # this loop and compiles it to a single popcount instruction.)
+    while mask:
+        mask &= mask - np.uint64(1)
+        count += 1
+
+    return count
+
+
 def rand_adj_matrix(num_verts: int, num_colors: int) -> np.ndarray:
     """
     Generates the adjacency matrix of a random edge-colored graph.
@@ -539,11 +874,15 @@ def rand_adj_matrix(num_verts: int, num_colors: int) -> np.ndarray:
         the diagonal, and all other entries chosen uniformly at random
         from {0,1,2, ... ,num_colors-1}.
     """
-    adj_matrix = np.zeros((num_verts, num_verts), dtype=int)
+    adj_matrix = np.zeros((num_verts, num_verts), dtype=np.int8)
 
-    for i, j in combinations(range(num_verts), 2):
-        adj_matrix[i, j] = np.random.choice(range(num_colors))
-        adj_matrix[j, i] = adj_matrix[i, j]
+    # Draw all edge colors in one call, in the same (lexicographic)
+    # order as "edge_pairs". This consumes the global random state
+    # exactly as drawing them one at a time would, so a given random
+    # seed still produces the same graph.
+    i, j = edge_pairs(num_verts)
+    adj_matrix[i, j] = np.random.randint(num_colors, size=len(i))
+    adj_matrix[j, i] = adj_matrix[i, j]
 
     return adj_matrix
 
@@ -583,9 +922,311 @@ def rand_graph(
     return graph
 
 
-def valid_moves(adj_matrix: np.ndarray, num_colors: int) -> list[tuple]:
+@njit(cache=True, parallel=True)
+def score_all_moves(  # noqa: PLR0913
+    neighbors: np.ndarray,
+    common_neighbors: np.ndarray,
+    moves: np.ndarray,
+    bad_sizes: np.ndarray,
+    books: bool,
+    binomials: np.ndarray,
+) -> np.ndarray:
+    """
+    Score change function for every move at once.
+
+    Each move is scored independently, so the moves are split up among
+    all available CPU cores.
+
+    Args:
+        neighbors: An array storing the neighborhood of each
+            vertex in the graph, in each color, as bitmasks.
+        common_neighbors: An array storing the common neighbors of
+            each pair of vertices in an edge-colored graph, in each
+            color, as bitmasks.
+        moves: An array of moves, one per row, each of the form
+            (u, v, new_color, old_color) (see "valid_moves").
+        bad_sizes: The size of books or wheels being counted in each
+            color.
+        books: If True, count books, and otherwise count wheels.
+        binomials: A table of binomial coefficients (see
+            "binomial_table"). Only used for books.
+
+    Returns:
+        An array whose i-th entry is the change in the number of
+        monochromatic books/wheels in the graph that would result from
+        making the i-th move.
+    """
+    deltas = np.empty(moves.shape[0], dtype=np.int64)
+
+    for i in prange(moves.shape[0]):
+        u = moves[i, 0]
+        v = moves[i, 1]
+        new_color = moves[i, 2]
+        old_color = moves[i, 3]
+
+        if books:
+            deltas[i] = count_books_change_nb(
+                common_neighbors=common_neighbors,
+                num_verts=neighbors.shape[1],
+                u=u,
+                v=v,
+                new_color=new_color,
+                old_color=old_color,
+                new_size=bad_sizes[new_color],
+                old_size=bad_sizes[old_color],
+                binomials=binomials,
+            )
+        else:
+            deltas[i] = count_wheels_change_nb(
+                neighbors=neighbors,
+                common_neighbors=common_neighbors,
+                u=u,
+                v=v,
+                new_color=new_color,
+                old_color=old_color,
+                new_size=bad_sizes[new_color],
+                old_size=bad_sizes[old_color],
+            )
+
+    return deltas
+
+
+@njit(cache=True)
+def seed_compiled_rng(seed: int) -> None:
     """
-    Creates a list of valid moves.
+    Seeds the random state used by compiled (Numba) code.
+
+    Compiled code draws from its own random state, separate from that
+    of NumPy, so it has to be seeded separately.
+
+    Args:
+        seed: A random seed value.
+
+    Returns:
+        None
+    """
+    np.random.seed(seed)
+
+
+@njit(cache=True, parallel=True)
+def tabu_steps(  # noqa: PLR0913
+    adj_matrix: np.ndarray,
+    neighbors: np.ndarray,
+    common_neighbors: np.ndarray,
+    moves: np.ndarray,
+    bad_sizes: np.ndarray,
+    books: bool,
+    binomials: np.ndarray,
+    keys: np.ndarray,
+    graph_hash: np.uint64,
+    visited_table: np.ndarray,
+    visited_size: int,
+    current_score: int,
+    record_score: int,
+) -> tuple[np.uint64, int, int, int]:
+    """
+    Takes tabu search steps until the score drops below a given record.
+
+    Each step scores every move, discards those leading to a graph
+    already visited, and makes one of the best remaining moves (chosen
+    uniformly at random, using the random state of compiled code -- see
+    "seed_compiled_rng"). The graph, the moves, and the table of visited
+    hashes are updated in place (the graph exactly as in
+    "RamseyGraph.make_move"). Also stops early if the table of visited
+    hashes becomes a quarter full, so that the caller can enlarge it.
+
+    Args:
+        adj_matrix: The adjacency matrix of an edge-colored graph.
+            (entries = edge-colors)
+        neighbors: An array storing the neighborhood of each
+            vertex in the graph, in each color, as bitmasks.
+        common_neighbors: An array storing the common neighbors of
+            each pair of vertices in an edge-colored graph, in each
+            color, as bitmasks.
+        moves: An array of moves, one per row, each of the form
+            (u, v, new_color, old_color) (see "valid_moves").
+        bad_sizes: The size of books or wheels being counted in each
+            color.
+        books: If True, count books, and otherwise count wheels.
+        binomials: A table of binomial coefficients (see
+            "binomial_table"). Only used for books.
+        keys: The Zobrist keys used to hash the graph (see
+            "zobrist_table").
+        graph_hash: The hash of the graph (see "hash_adj_matrix").
+        visited_table: A hash table storing the hashes of all graphs
+            visited so far (see "hash_table_insert"). Must be less than
+            a quarter full.
+        visited_size: The number of hashes stored in "visited_table".
+        current_score: The score of the graph.
+        record_score: The lowest score seen so far. At least one step is
+            always taken.
+
+    Returns:
+        A tuple containing the new hash of the graph, the number of
+        hashes in the table of visited hashes, the new score of the
+        graph, and the number of steps taken.
+    """
+    num_verts = neighbors.shape[1]
+    num_colors = neighbors.shape[0]
+    hashes = np.empty(len(moves), dtype=np.uint64)
+    steps = 0
+
+    while True:
+        # Score every possible move, and find the hash of the graph
+        # after each one, to check against the tabu set.
+        deltas = score_all_moves(
+            neighbors, common_neighbors, moves, bad_sizes, books, binomials
+        )
+        for i in prange(len(moves)):
+            edge_idx = edge_index(moves[i, 0], moves[i, 1], num_verts)
+            hashes[i] = (
+                graph_hash
+                ^ keys[edge_idx, moves[i, 3]]
+                ^ keys[edge_idx, moves[i, 2]]
+            )
+        is_tabu = hash_table_contains(visited_table, hashes)
+
+        # Choose the best-scoring move not in the tabu set, breaking ties
+        # uniformly at random. Rather than listing the tied moves, keep
+        # the k-th one found with probability 1/k (reservoir sampling).
+        best_delta = np.iinfo(np.int64).max
+        num_best = 0
+        move_index = -1
+        for i in range(len(moves)):
+            if is_tabu[i]:
+                continue
+            if deltas[i] < best_delta:
+                best_delta = deltas[i]
+                num_best = 0
+            if deltas[i] == best_delta:
+                num_best += 1
+                if np.random.random() * num_best < 1.0:
+                    move_index = i
+
+        if num_best == 0:
+            raise ValueError("Every move leads to a graph already visited.")
+
+        u = moves[move_index, 0]
+        v = moves[move_index, 1]
+        new_color = moves[move_index, 2]
+        old_color = moves[move_index, 3]
+
+        # Actually make the step: update tabu set, graph, etc.
+        graph_hash = hashes[move_index]
+        visited_size += hash_table_insert(visited_table, graph_hash)
+
+        adj_matrix[u, v] = new_color
+        adj_matrix[v, u] = new_color
+
+        row = edge_index(u, v, num_verts) * (num_colors - 1)
+        for color in range(num_colors):
+            if color != new_color:
+                moves[row, 2] = color
+                moves[row, 3] = new_color
+                row += 1
+
+        update_neighbors_on_edge(
+            neighbors, common_neighbors, u, v, new_color, old_color
+        )
+
+        current_score += best_delta
+        steps += 1
+
+        if (
+            current_score < record_score
+            or 4 * (visited_size + 1) > len(visited_table)
+        ):
+            return graph_hash, visited_size, current_score, steps
+
+
+def update_hash(  # noqa: PLR0913
+    graph_hash: int,
+    edge_idx: int,
+    new_color: int,
+    old_color: int,
+    num_verts: int,
+    num_colors: int,
+) -> int:
+    """
+    Updates the hash of a graph after changing the color of one edge.
+
+    Args:
+        graph_hash: The hash of an edge-colored graph, as computed by
+            "hash_adj_matrix".
+        edge_idx: The index of the edge being changed (see
+            "edge_index").
+        new_color: The new color of the edge.
+        old_color: The former color of the edge.
+        num_verts: The number of vertices in the graph.
+        num_colors: The number of possible edge-colors.
+
+    Returns:
+        The hash of the graph with the edge changed from "old_color" to
+        "new_color."
+    """
+    keys = zobrist_table(num_verts=num_verts, num_colors=num_colors)
+
+    # XOR-ing out the key for the old color and XOR-ing in the key for
+    # the new color gives the same result as re-hashing from scratch.
+    return (
+        graph_hash
+        ^ int(keys[edge_idx, old_color])
+        ^ int(keys[edge_idx, new_color])
+    )
+
+
+@njit(cache=True)
+def update_neighbors_on_edge(  # noqa: PLR0913
+    neighbors: np.ndarray,
+    common_neighbors: np.ndarray,
+    u: int,
+    v: int,
+    new_color: int,
+    old_color: int,
+) -> None:
+    """
+    Updates neighborhoods in place after changing the color of an edge.
+
+    Args:
+        neighbors: An array storing the neighborhood of each vertex
+            of an edge-colored graph in each color, as bitmasks.
+        common_neighbors: An array storing the common neighbors of
+            each pair of vertices of the graph, in each color, as
+            bitmasks.
+        u, v: The endpoints of the edge that was changed.
+        new_color: The new color of the edge (u,v).
+        old_color: The former color of the edge (u,v).
+
+    Returns:
+        None
+    """
+    num_verts = neighbors.shape[1]
+    u_bit = np.uint64(1) << u
+    v_bit = np.uint64(1) << v
+
+    # Vertices u,v are no longer adjacent in old_color, and are now
+    # adjacent in new_color.
+    neighbors[old_color, u] &= ~v_bit
+    neighbors[old_color, v] &= ~u_bit
+    neighbors[new_color, u] |= v_bit
+    neighbors[new_color, v] |= u_bit
+
+    # Only the neighborhoods of u and v changed, and only in old_color
+    # and new_color, so the only common neighborhoods that can change
+    # are those of pairs containing u or v in those two colors. Recompute
+    # just those.
+    for color in (old_color, new_color):
+        for x in (u, v):
+            for w in range(num_verts):
+                if w != x:
+                    common_neighbors[color, edge_index(x, w, num_verts)] = (
+                        neighbors[color, x] & neighbors[color, w]
+                    )
+
+
+def valid_moves(adj_matrix: np.ndarray, num_colors: int) -> np.ndarray:
+    """
+    Creates an array of valid moves.
 
     Args:
         The adjacency matrix of an edge-colored graph.
@@ -593,20 +1234,56 @@ def valid_moves(adj_matrix: np.ndarray, num_colors: int) -> list[tuple]:
         num_colors: The number of possible edge colors.
 
     Returns:
-        A list of all possible edits to the edge coloring, each stored
-        as a tuple of the form "(edge, new_color, current_color)."
+        An array of all possible edits to the edge coloring, one per
+        row, each of the form "(u, v, new_color, current_color)." The
+        moves for each edge (u,v) occupy a block of num_colors - 1
+        consecutive rows, and the blocks appear in the same order as the
+        edges in "edge_index" -- so the moves for a given edge can be
+        found (and edited) without searching.
     """
     num_verts = adj_matrix.shape[0]
 
-    valid_moves = []
+    # List every edge together with every color, then drop the rows
+    # where the "new" color is just the current color of the edge.
+    u, v = edge_pairs(num_verts)
+    current_colors = adj_matrix[u, v]
+
+    all_moves = np.stack(
+        np.broadcast_arrays(
+            u[:, None],
+            v[:, None],
+            np.arange(num_colors)[None, :],
+            current_colors[:, None],
+        ),
+        axis=-1,
+    ).reshape(-1, 4)
 
-    for i, j in combinations(range(num_verts), 2):
-        # For edge (i,j) include moves to any color other than its
-        # current color.
-        valid_moves += [
-            ((i, j), color, adj_matrix[i, j])
-            for color in range(num_colors)
-            if color != adj_matrix[i, j]
-        ]
+    valid_moves = all_moves[all_moves[:, 2] != all_moves[:, 3]]
 
     return valid_moves
+
+
+@cache
+def zobrist_table(num_verts: int, num_colors: int) -> np.ndarray:
+    """
+    Creates the table of random keys used for hashing graphs.
+
+    The keys are generated from a fixed seed, using a random number
+    generator separate from the global NumPy one -- so the table is the
+    same every time, and does not disturb seeded searches.
+
+    Args:
+        num_verts: The number of vertices in the graph.
+        num_colors: The number of possible edge-colors.
+
+    Returns:
+        An array of random 64-bit integers. Indexed by edges and colors:
+        the entry at indices [e, c] is the key for the edge with index e
+        (see "edge_index") having color c.
+    """
+    num_edges = num_verts * (num_verts - 1) // 2
+    rng = np.random.default_rng(0)
+
+    return rng.integers(
+        0, 2**64, size=(num_edges, num_colors), dtype=np.uint64
+    )
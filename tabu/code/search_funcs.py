@@ -19,15 +19,28 @@ import multiprocessing
 from typing import Callable
 
 import numpy as np
+from numba import config, set_num_threads
 
-from ramsey_class import RamseyGraph
-from ramsey_funcs import rand_graph
+from ramsey_class import HashSet, RamseyGraph
+from ramsey_funcs import (
+    binomial_table,
+    edge_pairs,
+    rand_graph,
+    seed_compiled_rng,
+    zobrist_table,
+)
+
+# Parameters shared by all the searches run by "parallel_search". These
+# are set before the searches are forked, so that each process inherits
+# them, rather than receiving its own pickled copy.
+shared_search_state = {}
 
 
 def tabu_nolimit(
     graph: RamseyGraph,
     print_bests: bool = True,
     process_number: int | None = None,
+    print_every: int = 1,
 ) -> tuple[RamseyGraph, dict[str, int]]:
     """
     Tabu search with infinite tabu tenure and no restarts.
@@ -50,6 +63,10 @@ def tabu_nolimit(
             attaining a new minimum score during the search.
         process_number: A number used to identify the search if multiple
             search instances are being run in parallel.
+        print_every: If "print_bests" is True, only every k-th new
+            minimum score is printed, where k = print_every. Printing
+            large graphs is slow, so this can be used to keep it from
+            dominating the early part of the search.
 
     Returns:
         A tuple containing:
@@ -63,40 +80,35 @@ def tabu_nolimit(
             0, since there are no restarts). If the optional argument
             "process_number" is used, this is also included.
     """
-    visited = {graph.hash}
+    if print_every < 1:
+        raise ValueError("print_every must be a positive integer.")
+
+    # Tiebreaks are drawn in compiled code, from its own random state;
+    # seed it from NumPy's, so that a given random seed still gives the
+    # same search.
+    seed_compiled_rng(np.random.randint(2**31))
+
+    visited = HashSet()
+    visited.add(graph.hash)
     current_score = graph.score()
-    best_score = math.inf
+    # No record yet -- any score counts as a new record.
+    best_score = np.iinfo(np.int64).max
     steps = 0
+    num_records = 0
 
     while True:
-        best_delta = math.inf
-        best_moves = []
-        # Check every possible move, rejecting any in the tabu set, and
-        # making a list of the best-scoring moves.
-        for move in graph.valid_moves:
-            if graph.hash_after_move(move) in visited:
-                continue
-            else:
-                delta = graph.move_score(move)
-                if delta == best_delta:
-                    best_moves.append(move)
-                elif delta < best_delta:
-                    best_delta = delta
-                    best_moves = [move]
-
-        # Choose the move with the best score, breaking ties randomly.
-        move_index = np.random.randint(len(best_moves))
-        move = best_moves[move_index]
-
-        # Actually make the step: update tabu list, graph, etc.
-        visited.add(graph.hash_after_move(move))
-        graph.make_move(move)
-        current_score += best_delta
-        steps += 1
+        # Run the search (in compiled code) until the next record score.
+        current_score, new_steps = graph.run_tabu_steps(
+            visited=visited,
+            current_score=current_score,
+            record_score=best_score,
+        )
+        steps += new_steps
 
         if current_score < best_score:
             best_score = current_score
-            if print_bests:
+            num_records += 1
+            if print_bests and num_records % print_every == 0:
                 # Keep the printouts clear and tidy if multiple
                 # processes are running in parallel.
                 if process_number is not None:
@@ -110,7 +122,7 @@ def tabu_nolimit(
                         f"\nNew record score of {best_score} at step {steps} "
                         "for this graph:"
                     )
-            print(graph)
+                print(graph)
 
         if current_score == 0:
             info = {"steps": steps, "score": 0}
@@ -161,6 +173,46 @@ def search_until_success(
     if seed is not None:
         np.random.seed(seed)
 
+    graph, total_steps = restart_until_success(
+        one_search=one_search,
+        build_graph_params=build_graph_params,
+        search_params=search_params,
+    )
+    report_final_graph(
+        graph=graph,
+        one_search=one_search,
+        build_graph_params=build_graph_params,
+        search_params=search_params,
+        seed=seed,
+        total_steps=total_steps,
+        save_final_graph=save_final_graph,
+    )
+
+    return graph
+
+
+def restart_until_success(
+    one_search: Callable,
+    build_graph_params: dict,
+    search_params: dict,
+) -> tuple[RamseyGraph, int]:
+    """
+    Re-starts local search from random graphs until one has score 0.
+
+    This is the search loop of "search_until_success", without the
+    final printout and saving of the graph found.
+
+    Args:
+        one_search: A local search function (e.g. tabu search).
+        build_graph_params: A dictionary of keyword arguments used to
+            initialize the starting graph in the local search.
+        search_params: A dictionary containing any parameters used by
+            "one_search".
+
+    Returns:
+        A tuple containing a graph with score 0, and the total number of
+        steps taken by all the searches.
+    """
     record_score = math.inf
     total_steps = 0
 
@@ -175,15 +227,44 @@ def search_until_success(
         total_steps += info["steps"]
 
         # Keep track of best-scoring constructions found.
-        if current_score < record_score:
-            record_score = current_score
-            if current_score == 0:
-                print("\nFinal graph:")
-            else:
-                print(
-                    f"\nNew record score of {record_score} for this graph:\n"
-                )
+        if 0 < current_score < record_score:
+            print(f"\nNew record score of {current_score} for this graph:\n")
             print(graph)
+        record_score = min(record_score, current_score)
+
+    return graph, total_steps
+
+
+def report_final_graph(  # noqa: PLR0913
+    graph: RamseyGraph,
+    one_search: Callable,
+    build_graph_params: dict,
+    search_params: dict,
+    seed: int | None,
+    total_steps: int,
+    save_final_graph: bool,
+) -> None:
+    """
+    Prints the graph found by a search, and optionally saves it.
+
+    Args:
+        graph: A graph with score 0.
+        one_search: The local search function used to find the graph.
+        build_graph_params: A dictionary of keyword arguments used to
+            initialize the starting graph in the local search.
+        search_params: A dictionary containing any parameters used by
+            "one_search".
+        seed: The random seed used for the search (if any).
+        total_steps: The total number of steps taken to find the graph.
+        save_final_graph: If True, the adjacency matrix of the graph
+            will be saved in a .txt file, along with some auxillary
+            information (problem parameters, etc.).
+
+    Returns:
+        None.
+    """
+    print("\nFinal graph:")
+    print(graph)
 
     # Save final construction (with score 0) as a text file.
     if save_final_graph:
@@ -195,7 +276,36 @@ def search_until_success(
             total_steps=total_steps,
         )
 
-    return graph
+
+def warm_up_kernels(build_graph_params: dict) -> None:
+    """
+    Compiles the scoring kernels before any searches are started.
+
+    The kernels in "ramsey_funcs" are compiled on first use and cached
+    on disk. Running them once on a tiny graph here means that parallel
+    searches all load the cached versions, rather than each compiling
+    them from scratch. The global random state is not used.
+
+    Note: this should be run in a separate process from the one that
+    starts the searches (see "parallel_search").
+
+    Args:
+        build_graph_params: A dictionary of keyword arguments used to
+            initialize graphs in the search (see "search_until_success").
+
+    Returns:
+        None.
+    """
+    graph = build_graph_params["graph_class"](
+        adj_matrix=np.zeros((4, 4), dtype=np.int8),
+        bad_sizes=build_graph_params["bad_sizes"],
+        bad_subgraph=build_graph_params["bad_subgraph"],
+    )
+    graph.run_tabu_steps(
+        visited=HashSet(),
+        current_score=graph.score(),
+        record_score=np.iinfo(np.int64).max,
+    )
 
 
 def parallel_search(  # noqa: PLR0913
@@ -209,13 +319,14 @@ def parallel_search(  # noqa: PLR0913
     """
     Runs local search on multiple threads.
 
-    This function parallelizes "search_until_success": it creates
-    mutliple processes, and in each one, takes a local search algorithm,
-    and runs it repeatedly, re-starting from a random graph each time,
-    until a graph of score 0 is achieved. As in "search_until_success",
-    if it is used as a wrapper for "tabu_nolimit", it will only run it
-    once in each process, as "tabu_nolimit" terminates only if a graph
-    of score 0 is found.
+    This function parallelizes "search_until_success": it creates a pool
+    of mutliple processes, and in each one, takes a local search
+    algorithm, and runs it repeatedly, re-starting from a random graph
+    each time, until a graph of score 0 is achieved. As soon as any one
+    process succeeds, the others are stopped. As in
+    "search_until_success", if it is used as a wrapper for
+    "tabu_nolimit", it will only run it once in each process, as
+    "tabu_nolimit" terminates only if a graph of score 0 is found.
 
     Args:
         one_search: A local search function (e.g. tabu search). Should
@@ -228,9 +339,8 @@ def parallel_search(  # noqa: PLR0913
             "one_search".
         seed: Optional random seed value.
         save_final_graph: If True, the adjacency matrix of the final
-            graph constructed by each process will be saved in a .txt
-            file, along with some auxillary information (problem
-            parameters, etc.).
+            graph constructed will be saved in a .txt file, along with
+            some auxillary information (problem parameters, etc.).
 
     Returns:
         None.
@@ -239,30 +349,151 @@ def parallel_search(  # noqa: PLR0913
     if seed is None:
         seed = np.random.randint(2**31)
 
-    np.random.seed(seed)
     # Generate a seed for each thread, starting from the "master seed".
-    # It is not important for these seeds to be random per se, but an
-    # unstructured choice here helps ensure that different values of the
-    # "master seed" will generally give different seeds for each thread.
-    process_seeds = [np.random.randint(2**31) for _ in range(num_threads)]
-
-    processes = []
-
-    for i in range(num_threads):
-        # Label the processes to make printouts more clear and tidy.
-        search_params["process_number"] = i
-        processes.append(
-            multiprocessing.Process(
-                target=search_until_success,
-                args=(
-                    one_search,
-                    build_graph_params,
-                    dict(search_params),
-                    process_seeds[i],
-                    save_final_graph,
-                ),
-            )
+    # Spawning them from a SeedSequence keeps the random streams of the
+    # different threads independent of each other.
+    process_seeds = [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(seed).spawn(num_threads)
+    ]
+
+    # The searches rely on inheriting the shared state, so they must be
+    # forked (whatever the platform's default is).
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise RuntimeError(
+            "Parallel search needs to fork processes, which this platform"
+            " does not support. Run a single search instead (-p 1)."
         )
+    context = multiprocessing.get_context("fork")
+
+    # Compile once here, so the searches below don't all do it at once.
+    # This runs in its own process: the parallel kernels start a thread
+    # pool, which must not exist yet when the searches are forked.
+    warm_up = context.Process(
+        target=warm_up_kernels, args=(build_graph_params,)
+    )
+    warm_up.start()
+    warm_up.join()
+
+    share_search_state(
+        one_search=one_search,
+        build_graph_params=build_graph_params,
+        search_params=search_params,
+    )
+
+    # Only the seed and number of each search are sent to the processes.
+    tasks = list(zip(process_seeds, range(num_threads)))
+
+    # Hand out the searches to a pool of processes, and stop all of them
+    # as soon as the first one finishes.
+    with context.Pool(
+        num_threads,
+        initializer=share_compiled_threads,
+        initargs=(num_threads,),
+    ) as pool:
+        graph, search_params, process_seed, total_steps = next(
+            pool.imap_unordered(run_search_task, tasks, chunksize=1)
+        )
+        pool.terminate()
+
+    # Only the result used here is reported, even if other searches
+    # finished at nearly the same time.
+    report_final_graph(
+        graph=graph,
+        one_search=one_search,
+        build_graph_params=build_graph_params,
+        search_params=search_params,
+        seed=process_seed,
+        total_steps=total_steps,
+        save_final_graph=save_final_graph,
+    )
+
+
+def run_search_task(
+    task: tuple[int, int],
+) -> tuple[RamseyGraph, dict, int, int]:
+    """
+    Runs one of the searches started by "parallel_search".
+
+    All parameters other than the random seed and the number of the
+    search are read from "shared_search_state". The graph found is
+    returned rather than printed or saved, so that "parallel_search"
+    can report just the one result it uses.
+
+    Args:
+        task: A tuple containing the random seed for the search, and
+            the number used to identify it.
+
+    Returns:
+        A tuple containing the graph with score 0 that was found, the
+        search parameters used (including the number of the search),
+        the random seed, and the total number of steps taken.
+    """
+    seed, process_number = task
+    # Label the processes to make printouts more clear and tidy.
+    search_params = {
+        **shared_search_state["search_params"],
+        "process_number": process_number,
+    }
+
+    np.random.seed(seed)
+    graph, total_steps = restart_until_success(
+        one_search=shared_search_state["one_search"],
+        build_graph_params=shared_search_state["build_graph_params"],
+        search_params=search_params,
+    )
+
+    return graph, search_params, seed, total_steps
+
+
+def share_compiled_threads(num_processes: int) -> None:
+    """
+    Limits the threads used by the parallel kernels in this process.
 
-    for p in processes:
-        p.start()
+    Run in each process started by "parallel_search": by default, the
+    parallel kernels in every process would use all available CPU cores,
+    so the processes would compete for them. Instead, the cores are
+    split evenly between the processes.
+
+    Args:
+        num_processes: The number of processes sharing the cores.
+
+    Returns:
+        None.
+    """
+    set_num_threads(max(1, config.NUMBA_NUM_THREADS // num_processes))
+
+
+def share_search_state(
+    one_search: Callable,
+    build_graph_params: dict,
+    search_params: dict,
+) -> None:
+    """
+    Sets the state shared by the searches run by "parallel_search".
+
+    Also builds the (cached) lookup tables used by every search, so that
+    the forked processes share them rather than each building their own.
+
+    Args:
+        one_search: A local search function (e.g. tabu search).
+        build_graph_params: A dictionary of keyword arguments used to
+            initialize the starting graph in the local search.
+        search_params: A dictionary containing any parameters used by
+            "one_search".
+
+    Returns:
+        None.
+    """
+    shared_search_state.update(
+        one_search=one_search,
+        build_graph_params=build_graph_params,
+        search_params=search_params,
+    )
+
+    num_verts = build_graph_params["num_verts"]
+    edge_pairs(num_verts)
+    zobrist_table(
+        num_verts=num_verts, num_colors=build_graph_params["num_colors"]
+    )
+    binomial_table(max_n=num_verts, max_k=max(build_graph_params["bad_sizes"]))